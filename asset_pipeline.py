@@ -0,0 +1,323 @@
+"""
+    Project: Puzzle Slider Game -- Asset pipeline
+    Validate and convert a directory of new puzzles in bulk. Every .puz file
+    is checked in parallel across a process pool: the data is well formed
+    (see puzzle_file.check_puzzle_info()), the tile and thumbnail images
+    exist and decode, and the tiles are exactly 'size' pixels square. Good
+    puzzles are normalized into the layout the game uses:
+
+        OUT_DIR/<name>.puz
+        OUT_DIR/Images/<name>/<1..number>.gif, blank.gif, <name>_thumbnail.gif
+
+    and packed into an indexed asset pack (OUT_DIR/assets.pak), together with
+    a report of every puzzle (OUT_DIR/report.txt). Usage:
+
+        python asset_pipeline.py SRC_DIR OUT_DIR [--workers 4]
+
+    Asset pack format (all integers little-endian):
+        header: b'SPAK', version (B), number of entries (I)
+        entry:  path length (H), path (utf-8), data offset (I), data size (I)
+        data:   the file contents, one after another
+"""
+
+import argparse                      # command line options
+import os                            # walk the source directory
+import shutil                        # copy images
+import struct                        # pack the binary asset pack
+import time                          # time the pipeline
+from concurrent.futures import ProcessPoolExecutor  # validate in parallel
+import puzzle_file                   # read and check .puz files
+
+PACK_MAGIC = b'SPAK'
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct('<4sBI')
+PACK_ENTRY = struct.Struct('<H')
+PACK_LOCATION = struct.Struct('<II')
+PACK_NAME = 'assets.pak'
+REPORT_NAME = 'report.txt'
+
+
+def read_gif_size(file_name):
+    """
+    Decode the structure of a GIF image: the signature, the color tables,
+    and every extension and image block up to the trailer. The LZW image
+    data is not decompressed, but each data sub-block chain must be complete
+    Params -- file_name: a string, the image file name
+    Return -- a tuple, (width, height) of the image. Raise IOError if the
+              file can not be read, ValueError if it is not a complete GIF
+    """
+
+    with open(file_name, 'rb') as f:
+        data = f.read()
+    if data[:6] not in (b'GIF87a', b'GIF89a') or len(data) < 13:
+        raise ValueError('not a GIF image')
+    width, height, flags = struct.unpack('<HHB', data[6:11])
+    pos = 13
+    if flags & 0x80:                      # global color table
+        pos += 3 * 2 ** ((flags & 0x07) + 1)
+    images = 0
+
+    def skip_sub_blocks(pos):
+        # data sub-blocks end with a 0 size block
+        while pos < len(data) and data[pos] != 0:
+            pos += data[pos] + 1
+        if pos >= len(data):
+            raise ValueError('truncated data blocks')
+        return pos + 1
+
+    while pos < len(data):
+        block = data[pos]
+        if block == 0x3B:                 # trailer
+            if images == 0:
+                raise ValueError('no image data')
+            return width, height
+        elif block == 0x21:               # extension: label, sub-blocks
+            pos = skip_sub_blocks(pos + 2)
+        elif block == 0x2C:               # image descriptor
+            if pos + 10 > len(data):
+                raise ValueError('truncated image descriptor')
+            local_flags = data[pos + 9]
+            pos += 10
+            if local_flags & 0x80:        # local color table
+                pos += 3 * 2 ** ((local_flags & 0x07) + 1)
+            pos = skip_sub_blocks(pos + 1)  # LZW code size, then data
+            images += 1
+        else:
+            raise ValueError('unknown block 0x{:02x}'.format(block))
+    raise ValueError('missing trailer')
+
+
+def get_normal_names(info_dict):
+    """
+    Get the normalized image paths of a puzzle, relative to the game folder
+    Params -- info_dict: a dictionary, checked puzzle file data
+    Return -- a dictionary, key: puzzle file key ('thumbnail', '1', '2'...),
+              value: a string, the normalized image path
+    """
+
+    name = info_dict['name']
+    nums = int(info_dict['number'])
+    folder = 'Images/' + name + '/'
+    names = {'thumbnail': folder + name + '_thumbnail.gif'}
+    for i in range(1, nums):
+        names[str(i)] = folder + '{}.gif'.format(i)
+    names[str(nums)] = folder + 'blank.gif'   # Tile finds it by name
+    return names
+
+
+def check_puzzle(puz_path):
+    """
+    Check one puzzle file and its images. It runs in a worker process, so it
+    only returns plain data
+    Params -- puz_path: a string, the .puz file path. Image paths in the file
+                        are relative to the folder the file is in
+    Return -- a dictionary, 'file': the .puz file path, 'errors': a list of
+              error strings, 'info': the puzzle file data, 'images': a list
+              of (source image path, normalized image path)
+    """
+
+    report = {'file': puz_path, 'errors': [], 'info': {}, 'images': []}
+    try:
+        info_dict = puzzle_file.read_puzzle_file(puz_path)
+        puzzle_file.check_puzzle_info(info_dict)
+    except IOError:
+        report['errors'].append('could not open the file')
+        return report
+    except (ValueError, IndexError) as err:
+        report['errors'].append('malformed puzzle file' +
+                                (': {}'.format(err) if str(err) else ''))
+        return report
+    if not info_dict.get('name'):     # name the puzzle after its file
+        info_dict['name'] = os.path.splitext(os.path.basename(puz_path))[0]
+    name = info_dict['name']
+    # the name is a file and folder name, and no tile path may hold 'blank'
+    if (name != os.path.basename(name) or '..' in name or name == '.'
+            or '/' in name or '\\' in name or 'blank' in name):
+        report['errors'].append("puzzle name '{}' is not a plain file name"
+                                " without '..' or 'blank'".format(name))
+        return report
+
+    folder = os.path.dirname(puz_path)
+    size = float(info_dict['size'])
+    for key, normal_name in get_normal_names(info_dict).items():
+        image = os.path.join(folder, info_dict[key])
+        try:
+            width, height = read_gif_size(image)
+        except IOError:
+            report['errors'].append("image '{}' does not exist".format(
+                info_dict[key]))
+            continue
+        except ValueError as err:
+            report['errors'].append("image '{}' does not decode: {}".format(
+                info_dict[key], err))
+            continue
+        if key != 'thumbnail' and (width != size or height != size):
+            report['errors'].append(
+                "image '{}' is {}x{}, not size {}".format(
+                    info_dict[key], width, height, info_dict['size']))
+        report['images'].append((image, normal_name))
+    report['info'] = info_dict
+    return report
+
+
+def find_puzzles(src_dir):
+    """
+    Find all .puz files under a directory (sorted for a stable report)
+    Params -- src_dir: a string, the source directory
+    Return -- a list, each element is a .puz file path
+    """
+
+    puz_list = []
+    for root, dirs, files in os.walk(src_dir):
+        for file_name in files:
+            if file_name.endswith('.puz'):
+                puz_list.append(os.path.join(root, file_name))
+    return sorted(puz_list)
+
+
+def write_puzzle(out_dir, report):
+    """
+    Write a good puzzle in the normalized layout: its images, then its .puz
+    file with the normalized image paths
+    Params -- out_dir: a string, the output directory
+              report: a dictionary, the puzzle report (see check_puzzle())
+    Return -- a list, the written file paths relative to out_dir. Raise
+              OSError if a file can not be written
+    """
+
+    info_dict = report['info']
+    names = get_normal_names(info_dict)
+    nums = int(info_dict['number'])
+    lines = ['name: ' + info_dict['name'],
+             'number: ' + info_dict['number'],
+             'size: ' + info_dict['size'],
+             'thumbnail: ' + names['thumbnail']]
+    lines += ['{}: {}'.format(i, names[str(i)]) for i in range(1, nums + 1)]
+    puz_name = info_dict['name'] + '.puz'
+
+    written = []
+    for image, normal_name in report['images']:
+        target = os.path.join(out_dir, normal_name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(image, target)
+        written.append(normal_name)
+    with open(os.path.join(out_dir, puz_name), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return [puz_name] + written
+
+
+def write_pack(out_dir, paths):
+    """
+    Pack files into the asset pack, with an index of their paths
+    Params -- out_dir: a string, the output directory
+              paths: a list, file paths relative to out_dir
+    Return -- None
+    """
+
+    entries = [path.encode('utf-8') for path in paths]
+    offset = PACK_HEADER.size + sum(PACK_ENTRY.size + len(each)
+                                    + PACK_LOCATION.size for each in entries)
+    sizes = [os.path.getsize(os.path.join(out_dir, path)) for path in paths]
+    with open(os.path.join(out_dir, PACK_NAME), 'wb') as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(entries)))
+        for entry, size in zip(entries, sizes):
+            f.write(PACK_ENTRY.pack(len(entry)) + entry)
+            f.write(PACK_LOCATION.pack(offset, size))
+            offset += size
+        for path in paths:
+            with open(os.path.join(out_dir, path), 'rb') as f_data:
+                f.write(f_data.read())
+
+
+def read_pack_index(pack_name):
+    """
+    Read the index of an asset pack
+    Params -- pack_name: a string, the asset pack file name
+    Return -- a dictionary, key: file path (str), value: (offset, size).
+              Raise IOError if the file can not be read, ValueError if it is
+              not an asset pack
+    """
+
+    index = {}
+    with open(pack_name, 'rb') as f:
+        magic, version, count = PACK_HEADER.unpack(f.read(PACK_HEADER.size))
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError
+        for i in range(count):
+            length, = PACK_ENTRY.unpack(f.read(PACK_ENTRY.size))
+            path = f.read(length).decode('utf-8')
+            index[path] = PACK_LOCATION.unpack(f.read(PACK_LOCATION.size))
+    return index
+
+
+def run(src_dir, out_dir, workers=None):
+    """
+    Run the pipeline: check all puzzles in parallel, then write the good
+    ones, the asset pack and the report
+    Params -- src_dir: a string, the source directory
+              out_dir: a string, the output directory
+              workers: an int, number of worker processes, default to None
+                       (number of CPUs)
+    Return -- a tuple, (number of good puzzles, number of bad puzzles).
+              Raise ValueError if out_dir is src_dir or inside it, which
+              would overwrite the source puzzles
+    """
+
+    src_path = os.path.realpath(src_dir)
+    out_path = os.path.realpath(out_dir)
+    if os.path.commonpath([src_path, out_path]) == src_path:
+        raise ValueError('the output directory must not be the source '
+                         'directory or inside it')
+    start = time.time()
+    puz_list = find_puzzles(src_dir)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        reports = list(executor.map(check_puzzle, puz_list,
+                                    chunksize=max(1, len(puz_list) // 64)))
+
+    os.makedirs(out_dir, exist_ok=True)
+    packed, names, lines = [], set(), []
+    for report in reports:
+        name = report['info'].get('name')
+        if not report['errors'] and name in names:
+            report['errors'].append("puzzle name '{}' is used".format(name))
+        if not report['errors']:
+            try:
+                packed += write_puzzle(out_dir, report)
+                names.add(name)
+                lines.append('OK      {}  ->  {}.puz'.format(report['file'],
+                                                             name))
+                continue
+            except OSError as err:       # shutil.SameFileError is one
+                report['errors'].append('could not write: {}'.format(err))
+        lines.append('FAILED  {}'.format(report['file']))
+        lines += ['        ' + each for each in report['errors']]
+    write_pack(out_dir, packed)
+
+    good = len(names)
+    lines.append('{} puzzles, {} OK, {} FAILED, {} files packed, {:.2f}s'
+                 .format(len(reports), good, len(reports) - good,
+                         len(packed), time.time() - start))
+    with open(os.path.join(out_dir, REPORT_NAME), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return good, len(reports) - good
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Validate, normalize and pack a directory of puzzles.')
+    parser.add_argument('src_dir')
+    parser.add_argument('out_dir')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes')
+    args = parser.parse_args()
+
+    try:
+        good, bad = run(args.src_dir, args.out_dir, args.workers)
+    except ValueError as err:
+        parser.error(str(err))
+    print('{} OK, {} FAILED, see {}'.format(
+        good, bad, os.path.join(args.out_dir, REPORT_NAME)))
+
+
+if __name__ == "__main__":
+    main()
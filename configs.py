@@ -38,3 +38,11 @@ VALID_NUMS = {16, 9, 4}                      # valid tile numbers
 SIZE_BOUND = (50, 110)                       # valid tile size range
 FILE_KEYS = {'size', 'number', 'thumbnail'}  # necessary puzzle file keys
 MAX_LEADERS = 10                             # max leaders record kept
+POOL_FILE = 'scramble_pool.bin'              # pre-generated scramble pool
+POOL_MOVE_RATIO = 0.5    # optimal length of a scramble / max_move_num
+SNAPSHOT_FILE = 'puzzle_save.snap'           # snapshot of the game to resume
+SNAPSHOT_INTERVAL = 1.0                      # seconds to batch snapshots
+EVENT_LOG_FILE = 'puzzle_log.jsonl'          # errors and gameplay events
+EVENT_LOG_MAX_BYTES = 2 ** 20                # size to rotate the log file
+EVENT_LOG_BACKUPS = 5                        # compressed log backups kept
+EVENT_LOG_INTERVAL = 2.0                     # seconds between log flushes
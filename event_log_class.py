@@ -0,0 +1,127 @@
+"""
+    Project: Puzzle Slider Game -- EventLogger class
+    Log errors and gameplay events (loads, moves, wins, losses) as JSON
+    lines. Each line is an object whose first key is the event name, e.g.
+    {"event":"win","time":1650000000.0,"puzzle":"mario.puz","moves":23,...}
+    The log file is rotated by size into gzip compressed backups:
+    puzzle_log.jsonl -> puzzle_log.jsonl.1.gz -> puzzle_log.jsonl.2.gz ...
+    (see log_query.py to aggregate them)
+"""
+
+import atexit                        # flush the last events at exit
+import gzip                          # compress rotated log files
+import json                          # format events
+import os                            # rotate log files
+import shutil                        # compress rotated log files
+import threading                     # flush events in the background
+import time                          # time of the events
+
+
+class EventLogger:
+    """
+    An EventLogger keeps new events in an in-memory buffer, and a background
+    thread appends them to the log file every 'interval' seconds, so logging
+    an event does not touch the disk. When the log file grows over
+    'max_bytes', it is compressed into the first backup, and at most
+    'backups' backups are kept. Events still buffered when the program exits
+    (normally, by an unhandled error, or by closing the window) are flushed
+    then
+    """
+
+    def __init__(self, file_name, max_bytes=2 ** 20, backups=5,
+                 interval=2.0):
+        """
+        Create an EventLogger and start its background thread
+        Params -- file_name: a string, the log file name
+                  max_bytes: an int, size to rotate the log file, default to
+                             1 MB
+                  backups: an int, number of compressed backups kept,
+                           default to 5
+                  interval: a float, seconds between flushes, default to 2.0
+        Return -- None
+        """
+
+        self.file_name = file_name
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.interval = interval
+        self._buffer = []             # formatted lines not written yet
+        self._lock = threading.Lock()          # guards the buffer
+        self._write_lock = threading.Lock()    # guards the log files
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def __str__(self):
+        """When printing, indicate the log file and buffered events. """
+
+        return "EventLogger of {} ({} events buffered)".format(
+            self.file_name, len(self._buffer))
+
+    def log(self, event, **fields):
+        """
+        Add an event to the buffer
+        Params -- event: a string, the event name ('error', 'load', 'move',
+                         'win', 'lose'...)
+                  fields: keyword arguments, data of the event, must be JSON
+                          serializable
+        Return -- None
+        """
+
+        record = {'event': event, 'time': round(time.time(), 3)}
+        record.update(fields)
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._buffer.append(line)
+
+    def flush(self):
+        """
+        Append the buffered events to the log file now, rotating the file
+        when it is too large
+        Params -- None
+        Return -- None
+        """
+
+        with self._write_lock:     # keeps the events in order
+            with self._lock:       # log() only waits for the swap
+                lines, self._buffer = self._buffer, []
+            if not lines:
+                return
+            data = ''.join(lines)
+            with open(self.file_name, 'a') as f:
+                f.write(data)
+                size = f.tell()
+            if size >= self.max_bytes:
+                self._rotate()
+
+    def _run(self):
+        """
+        The background thread: flush the buffer every 'interval' seconds
+        Params -- None
+        Return -- None
+        """
+
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except OSError:
+                pass       # the events are dropped, the game goes on
+
+    def _rotate(self):
+        """
+        Shift the backups by one (dropping the oldest), and compress the log
+        file into the first backup
+        Params -- None
+        Return -- None
+        """
+
+        for i in range(self.backups - 1, 0, -1):
+            older = '{}.{}.gz'.format(self.file_name, i)
+            if os.path.exists(older):
+                os.replace(older, '{}.{}.gz'.format(self.file_name, i + 1))
+        if self.backups > 0:
+            with open(self.file_name, 'rb') as f_in, \
+                    gzip.open(self.file_name + '.1.gz', 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+        os.remove(self.file_name)
@@ -8,12 +8,16 @@
 import turtle
 import math                          # calculate sqrt, floor integer
 import os                            # get puzzle file names
-import random                        # shuffle the tiles
+import struct                        # error of a broken pool file
 import time                          # linger the messages
-from datetime import datetime        # get date&time when logging error
 from configs import *                # configuration of the Game
 from myturtle_class import MyTurtle  # helper class - improved turtle
 from tile_class import Tile          # helper class - the tiles
+from snapshot_class import SnapshotWriter  # helper class - save the game
+from event_log_class import EventLogger  # helper class - log events
+import puzzle_file                   # read and check .puz files
+import scramble_pool                 # pre-generated scrambled boards
+import solver                        # scramble boards when no pool
 
 
 class Game:
@@ -28,11 +32,12 @@ class Game:
     __str__ method is not created because it makes little sense here
     """
 
-    def __init__(self):
+    def __init__(self, snapshot=None):
         """
         Create a slider puzzle game. Load the UI elements, and register mouse
         click (look through the codes for detail steps)
-        Params -- None
+        Params -- snapshot: a dictionary, a saved game to resume (see
+                            snapshot_class.read_snapshot()), default to None
         Return -- None
         """
 
@@ -45,6 +50,7 @@ class Game:
         self.max_move_num = 50                 # default maximum move number
         self.leaders = []                      # game performance leaders
         self.info_dict = {}           # information dictionary of the puzzle
+        self.puzzle_file = 'mario.puz'  # file name of the current puzzle
         self.tile_interval = 2        # set the interval between 2 tiles
         self.player_moves = 0         # initialize to 0
         self.all_tiles = []           # list of the tiles
@@ -52,26 +58,75 @@ class Game:
         self.thumb_t = MyTurtle(CORS_DICT['thumbnail'])  # thumbnail turtle
         self.moves_t = MyTurtle(CORS_DICT['move_counter'])  # moves counter
         self.pen_t = MyTurtle()       # the turtle pen to do other things
-        self.play()
-
-    def play(self):
-        """
-        The main driver of the game
-        Params -- None
+        self.event_log = EventLogger(EVENT_LOG_FILE, EVENT_LOG_MAX_BYTES,
+                                     EVENT_LOG_BACKUPS, EVENT_LOG_INTERVAL)
+        self.pool_index = self.read_pool_index()  # scramble pool index
+        self.snapshot_w = SnapshotWriter(SNAPSHOT_FILE, SNAPSHOT_INTERVAL)
+        self.play(snapshot)
+
+    def play(self, snapshot=None):
+        """
+        The main driver of the game. If there is a saved game, resume it
+        without the splash screen and the pop-up windows
+        Params -- snapshot: a dictionary, a saved game to resume, default to
+                            None
         Return -- None
         """
 
-        self.show_msg('splash')  # show splash screen, linger 2 sec
-        self.player_name = self.get_player_name()
-        self.max_move_num = self.get_max_move_num()
+        resumed = self.restore_snapshot(snapshot)
+        if not resumed:
+            self.show_msg('splash')  # show splash screen, linger 2 sec
+            self.player_name = self.get_player_name()
+            self.max_move_num = self.get_max_move_num()
         self.load_frames()
         self.load_buttons()
         self.leaders = self.read_leaderboard_file()
         self.show_leaderboard()
-        self.load_new_puzzle()
+        if resumed:
+            try:
+                self.resume_puzzle(snapshot['board'],
+                                   snapshot['player_moves'])
+            except:       # e.g. an image of the saved puzzle is gone
+                self.snapshot_w.discard()
+                self.log_error('Could not resume saved game: {}'.format(
+                    snapshot['puzzle']), 'Game.resume_puzzle()')
+                self.load_new_puzzle()
+        else:
+            self.load_new_puzzle()
         self.init_status_area()
         turtle.mainloop()
 
+    def restore_snapshot(self, snapshot):
+        """
+        Restore the player name, maximum move number and puzzle information
+        of a saved game. If the puzzle file can not be loaded any more, the
+        saved board does not match it or is not solvable, or the saved moves
+        already reach the maximum, log the error and start a new game
+        Params -- snapshot: a dictionary, a saved game, or None
+        Return -- Boolean, True if the saved game can be resumed
+        """
+
+        if snapshot is None:
+            return False
+        try:
+            self.read_new_puzzle_file(snapshot['puzzle'])
+            number = int(self.info_dict['number'])
+            if (sorted(snapshot['board']) != list(range(number)) or
+                    not solver.is_solvable(snapshot['board'],
+                                           int(math.sqrt(number))) or
+                    not (0 <= snapshot['player_moves']
+                         < snapshot['max_move_num'])):
+                raise ValueError
+        except:
+            self.info_dict = {}
+            self.log_error('Could not resume saved game: {}'.format(
+                snapshot['puzzle']), 'Game.restore_snapshot()')
+            return False
+        self.puzzle_file = snapshot['puzzle']
+        self.player_name = snapshot['player_name']
+        self.max_move_num = snapshot['max_move_num']
+        return True
+
     def show_msg(self, name, seconds=2):
         """
         Show splash, error, win...messages for some seconds (default to 2)
@@ -165,6 +220,22 @@ class Game:
             self.log_error(name, location)
         return leaders
 
+    def read_pool_index(self):
+        """
+        Get the index of the scramble pool file (see scramble_pool.py). If
+        failing to read the file, log the error and return {}, so the tiles
+        will be scrambled by random walks instead
+        Params -- None
+        Return -- a dictionary, the pool index
+        """
+
+        try:
+            return scramble_pool.read_pool_index(POOL_FILE)
+        except (IOError, ValueError, struct.error):
+            self.log_error('Could not read {}.'.format(POOL_FILE),
+                           'Game.read_pool_index()')
+        return {}
+
     def show_leaderboard(self):
         """
         Show game leaders on the leaderboard line by line, with a 'Leaders'
@@ -194,11 +265,37 @@ class Game:
         """
 
         self.read_new_puzzle_file(selection)  # update the info_dict
+        self.puzzle_file = selection
         self.player_moves = 0  # reset the moves count to 0
         self.moves_t.clear()  # clear the moves counter shown
         self.clear_tiles()  # clear current tiles
         self.generate_tiles()  # load new tiles
         self.show_thumbnail(self.info_dict['thumbnail'])
+        self.save_snapshot()
+        self.event_log.log('load', puzzle=selection,
+                           number=int(self.info_dict['number']),
+                           max_move_num=self.max_move_num,
+                           player=self.player_name)
+
+    def resume_puzzle(self, board, player_moves):
+        """
+        Show the saved board and move counter of a resumed game. The puzzle
+        information dictionary is already restored
+        Params -- board: a list, the i-th element is the original index of
+                         the tile at i-th position
+                  player_moves: an int, number of moves already used
+        Return -- None
+        """
+
+        self.player_moves = player_moves
+        self.moves_t.write(str(self.player_moves),
+                           font=FONT_DICT['status_area'])
+        self.generate_tiles(board)
+        self.show_thumbnail(self.info_dict['thumbnail'])
+        self.event_log.log('resume', puzzle=self.puzzle_file,
+                           moves=self.player_moves,
+                           max_move_num=self.max_move_num,
+                           player=self.player_name)
 
     def read_new_puzzle_file(self, selection):
         """
@@ -208,11 +305,7 @@ class Game:
         Return -- None. Just update info_dict or raise error
         """
 
-        new_info_dict = {}
-        with open(selection, 'r') as f:
-            for line in f:
-                info_list = line.split(':')
-                new_info_dict[info_list[0].strip()] = info_list[1].strip()
+        new_info_dict = puzzle_file.read_puzzle_file(selection)
         self.validate_puzzle_file(new_info_dict)
 
     def validate_puzzle_file(self, new_info_dict):
@@ -224,17 +317,7 @@ class Game:
         Return -- None. Just update info_dict or raise error
         """
 
-        if not (new_info_dict.keys() > FILE_KEYS):  # check necessary keys
-            raise ValueError
-        size = float(new_info_dict['size'])
-        nums = int(new_info_dict['number'])
-        if ((nums not in VALID_NUMS) or (size > SIZE_BOUND[1]) or
-                (size < SIZE_BOUND[0])):  # validate numbers and size
-            raise ValueError
-        # '1', '2', '3'... '(nums)' should be in the dict keys
-        for i in range(1, nums + 1):
-            if str(i) not in new_info_dict:
-                raise ValueError
+        puzzle_file.check_puzzle_info(new_info_dict)
         self.info_dict = new_info_dict  # update self.info_dict 'safely'
 
     def clear_tiles(self):
@@ -250,16 +333,18 @@ class Game:
             each.hideturtle()
         self.all_tiles = []
 
-    def generate_tiles(self):
+    def generate_tiles(self, index=None):
         """
         Create the tiles in a scrambled status
-        Params -- None
+        Params -- index: a list, the i-th element is the original index of
+                         the tile at i-th position, default to None (get a
+                         new scrambled one)
         Return -- None. Update the self.all_tiles list
         """
 
         position_list = self.generate_positions()  # unscramble ordered list
-        index = list(range(int(self.info_dict['number'])))
-        random.shuffle(index)  # index list is scrambled now
+        if index is None:
+            index = self.get_scramble()  # index list is scrambled now
         for i in range(len(index)):
             # format: Tile(game, tile image, ori-index, pos_index, cors)
             # the original index[i]-th tile appears at i-th position
@@ -267,6 +352,32 @@ class Game:
                             index[i], i, position_list[i])
             self.all_tiles.append(new_tile)
 
+    def get_scramble(self):
+        """
+        Get a solvable scrambled index list whose optimal solution length is
+        about POOL_MOVE_RATIO of max_move_num, picked from the scramble pool.
+        If the pool has no such board, scramble by a random walk of that
+        many slides instead
+        Params -- None
+        Return -- a list, the i-th element is the original index of the tile
+                  at i-th position
+        """
+
+        number = int(self.info_dict['number'])
+        length = max(1, int(self.max_move_num * POOL_MOVE_RATIO))
+        index = None
+        if number in self.pool_index:
+            try:
+                index = scramble_pool.pick_board(POOL_FILE, self.pool_index,
+                                                 number, length)
+            except IOError:
+                self.log_error('Could not read {}.'.format(POOL_FILE),
+                               'Game.get_scramble()')
+        # a walk may go round in a loop back to the unscrambled board
+        while index is None or index == sorted(index):
+            index = list(solver.random_walk(int(math.sqrt(number)), length))
+        return index
+
     def generate_positions(self):
         """
         Generate position grids for the tiles, such that the tiles are center
@@ -336,8 +447,28 @@ class Game:
         self.moves_t.clear()
         self.moves_t.write(str(self.player_moves),
                            font=FONT_DICT['status_area'])
+        self.save_snapshot()
+        self.event_log.log('move', puzzle=self.puzzle_file,
+                           moves=self.player_moves)
         self.check_success()
 
+    def save_snapshot(self):
+        """
+        Save the current puzzle, board, moves and settings, so the game can
+        be resumed. The snapshot is written in the background (see
+        SnapshotWriter)
+        Params -- None
+        Return -- None
+        """
+
+        board = [0] * len(self.all_tiles)
+        for each in self.all_tiles:
+            board[each.get_pos_index()] = each.get_index()
+        self.snapshot_w.save({'puzzle': self.puzzle_file, 'board': board,
+                              'player_moves': self.player_moves,
+                              'max_move_num': self.max_move_num,
+                              'player_name': self.player_name})
+
     def check_success(self):
         """
         Check game status. If the tiles are unscrambled, then player wins, so
@@ -350,14 +481,30 @@ class Game:
         """
 
         if self.is_unscrambled():
+            self.snapshot_w.discard()  # nothing to resume
+            self.log_game_over('win')
             self.update_leaderboard()
             self.show_msg('win')
             self.close_window()
         else:
             if self.player_moves == self.max_move_num:
+                self.snapshot_w.discard()
+                self.log_game_over('lose')
                 self.show_msg('lose')
                 self.close_window()
 
+    def log_game_over(self, event):
+        """
+        Log the end of a game with the puzzle, moves used and player
+        Params -- event: a string, 'win' or 'lose'
+        Return -- None
+        """
+
+        self.event_log.log(event, puzzle=self.puzzle_file,
+                           moves=self.player_moves,
+                           max_move_num=self.max_move_num,
+                           player=self.player_name)
+
     def is_unscrambled(self):
         """
         Check whether the tiles are unscrambled by comparing their original
@@ -417,6 +564,9 @@ class Game:
                 position_list[self.all_tiles[i].get_index()])
             # reset their position index to unscrambled index
             self.all_tiles[i].update_pos_index(self.all_tiles[i].get_index())
+        self.save_snapshot()
+        self.event_log.log('reset', puzzle=self.puzzle_file,
+                           moves=self.player_moves)
 
     def get_new_selection(self, x, y):
         """
@@ -479,30 +629,32 @@ class Game:
 
     def close_window(self):
         """
-        When the game exits, show credit image, then terminate the program
+        When the game exits, write the latest snapshot (if the game is not
+        over) and the buffered events, show credit image, then terminate the
+        program
         Params -- None
         Return -- None
         """
 
+        self.snapshot_w.flush()
+        self.event_log.log('exit', puzzle=self.puzzle_file,
+                           moves=self.player_moves)
+        self.event_log.flush()
         self.show_msg('credit')
         self.ts.clearscreen()
         self.ts.bye()
 
     def log_error(self, name, location):
         """
-        Log errors to error file ('puzzle_log.err') in a specific format:
-        'Sat Dec  4 21:57:17 2021:  Error: Malformed puzzle file:
-        malformed_mario.puz  LOCATION: Game.load_new_puzzle()'
+        Log errors to the event log (EVENT_LOG_FILE) as 'error' events, e.g.
+        {"event":"error","time":1638673037.0,"name":"Malformed puzzle file:
+        malformed_mario.puz","location":"Game.load_new_puzzle()"}
         Params -- name: a string, brief description of the error
                   location: a string, the method position of the error
-        Return -- None. Just append information to the error file
+        Return -- None. The event is written in the background
         """
 
-        now_time = datetime.now().strftime('%c') + ':'  # current date & time
-        name = '  Error: ' + name
-        location = '  LOCATION: ' + location
-        with open('puzzle_log.err', 'a') as f:
-            f.write(now_time + name + location + '\n')
+        self.event_log.log('error', name=name, location=location)
 
     def get_tile_size(self):
         """Return the tile size (float). """
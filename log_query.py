@@ -0,0 +1,126 @@
+"""
+    Project: Puzzle Slider Game -- Log query
+    Aggregate the event log (see event_log_class.py) across the log file and
+    its rotated backups: number of games, wins, losses, win rate and moves
+    used per puzzle. Usage:
+
+        python log_query.py [--log puzzle_log.jsonl] [--errors]
+"""
+
+import argparse                      # command line options
+import glob                          # find rotated backups
+import gzip                          # read rotated backups
+import json                          # parse events
+from configs import EVENT_LOG_FILE
+
+# lines of these events start with these prefixes (the event key is first)
+GAME_PREFIXES = ('{"event":"load"', '{"event":"win"', '{"event":"lose"')
+ERROR_PREFIX = '{"event":"error"'
+
+
+def get_log_files(file_name):
+    """
+    Get the log file and its rotated backups, oldest first
+    Params -- file_name: a string, the log file name
+    Return -- a list, the file names
+    """
+
+    backups = [name for name in glob.glob(file_name + '.*.gz')
+               if name[len(file_name) + 1:-3].isdigit()]
+    backups.sort(key=lambda name: int(name[len(file_name) + 1:-3]),
+                 reverse=True)
+    return backups + glob.glob(file_name)
+
+
+def read_events(file_name, prefixes):
+    """
+    Read the events of some kinds from the log file and its backups. Lines
+    of other events (moves are most of them) are skipped without parsing
+    Params -- file_name: a string, the log file name
+              prefixes: a tuple, line prefixes of the wanted events
+    Return -- a generator of dictionaries, the events, oldest first
+    """
+
+    for log_file in get_log_files(file_name):
+        opener = gzip.open if log_file.endswith('.gz') else open
+        with opener(log_file, 'rt') as f:
+            for line in f:
+                if line.startswith(prefixes):
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        pass          # a line cut by a crash
+
+
+def get_puzzle_stats(file_name):
+    """
+    Aggregate games per puzzle
+    Params -- file_name: a string, the log file name
+    Return -- a dictionary, key: puzzle file name, value: a dictionary with
+              'loads', 'wins', 'losses', 'win_rate' (of finished games),
+              'win_moves' (average moves of wins, None if no win), and
+              'moves' (average moves of finished games, None if none)
+    """
+
+    stats = {}
+    for record in read_events(file_name, GAME_PREFIXES):
+        each = stats.setdefault(record.get('puzzle'),
+                                {'loads': 0, 'wins': 0, 'losses': 0,
+                                 'win_total': 0, 'total': 0})
+        if record['event'] == 'load':
+            each['loads'] += 1
+        elif record['event'] == 'win':
+            each['wins'] += 1
+            each['win_total'] += record.get('moves', 0)
+            each['total'] += record.get('moves', 0)
+        else:
+            each['losses'] += 1
+            each['total'] += record.get('moves', 0)
+
+    for each in stats.values():
+        finished = each['wins'] + each['losses']
+        each['win_rate'] = each['wins'] / finished if finished else None
+        each['win_moves'] = (each.pop('win_total') / each['wins']
+                             if each['wins'] else None)
+        each['moves'] = each.pop('total') / finished if finished else None
+    return stats
+
+
+def format_number(value, pattern):
+    """Return the formatted value, or '-' if it is None (str). """
+
+    return '-' if value is None else pattern.format(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Aggregate win rates and moves per puzzle.')
+    parser.add_argument('--log', default=EVENT_LOG_FILE,
+                        help='the log file name')
+    parser.add_argument('--errors', action='store_true',
+                        help='also count errors by location')
+    args = parser.parse_args()
+
+    print('{:<20}{:>7}{:>6}{:>8}{:>10}{:>11}{:>11}'.format(
+        'puzzle', 'loads', 'wins', 'losses', 'win rate', 'win moves',
+        'avg moves'))
+    for puzzle, each in sorted(get_puzzle_stats(args.log).items(),
+                               key=lambda item: str(item[0])):
+        print('{:<20}{:>7}{:>6}{:>8}{:>10}{:>11}{:>11}'.format(
+            str(puzzle)[:19], each['loads'], each['wins'], each['losses'],
+            format_number(each['win_rate'], '{:.1%}'),
+            format_number(each['win_moves'], '{:.1f}'),
+            format_number(each['moves'], '{:.1f}')))
+
+    if args.errors:
+        errors = {}
+        for record in read_events(args.log, (ERROR_PREFIX,)):
+            location = record.get('location')
+            errors[location] = errors.get(location, 0) + 1
+        print('\nerrors:')
+        for location, count in sorted(errors.items(), key=str):
+            print('{:>7}  {}'.format(count, location))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,14 @@
 """
 
 
+from configs import SNAPSHOT_FILE
 from game_class import Game
+from snapshot_class import read_snapshot
 
 
 def main():
-    game = Game()      # create the Game
+    snapshot = read_snapshot(SNAPSHOT_FILE)  # None if no game to resume
+    game = Game(snapshot)      # create the Game
 
 
 if __name__ == "__main__":
@@ -0,0 +1,51 @@
+"""
+    Project: Puzzle Slider Game -- Puzzle file
+    Read and check the .puz files. Shared by the Game and the asset pipeline
+    (see asset_pipeline.py), so it does not depend on turtle
+"""
+
+from configs import *                # configuration of the Game
+
+
+def read_puzzle_file(file_name):
+    """
+    Read a puzzle file, each line format -- key: value
+    Params -- file_name: a string, the .puz file name
+    Return -- a dictionary, the puzzle file data. Raise IOError if the file
+              can not be opened, IndexError if a line has no ':'
+    """
+
+    info_dict = {}
+    with open(file_name, 'r') as f:
+        for line in f:
+            info_list = line.split(':')
+            info_dict[info_list[0].strip()] = info_list[1].strip()
+    return info_dict
+
+
+def check_puzzle_info(info_dict):
+    """
+    Check if the puzzle file data is good (no malformed data): the necessary
+    keys exist, the tile number and size are valid, every tile has an image,
+    and only the last tile is the blank one (a Tile finds the blank by its
+    image name, and scrambled boards assume it is the last tile). Raise
+    ValueError if not
+    Params -- info_dict: a dictionary, data read from the .puz file
+    Return -- None
+    """
+
+    if not (info_dict.keys() > FILE_KEYS):  # check necessary keys
+        raise ValueError
+    size = float(info_dict['size'])
+    nums = int(info_dict['number'])
+    if ((nums not in VALID_NUMS) or (size > SIZE_BOUND[1]) or
+            (size < SIZE_BOUND[0])):  # validate numbers and size
+        raise ValueError
+    # '1', '2', '3'... '(nums)' should be in the dict keys
+    for i in range(1, nums + 1):
+        if str(i) not in info_dict:
+            raise ValueError
+    for i in range(1, nums + 1):
+        if ('blank' in info_dict[str(i)]) != (i == nums):
+            raise ValueError('tile {} must be the only blank tile'.format(
+                nums))
@@ -0,0 +1,209 @@
+"""
+    Project: Puzzle Slider Game -- Scramble pool
+    Pre-generated pools of solvable scrambled boards, grouped into buckets by
+    their optimal solution length, for every valid tile number. Run this file
+    offline to (re)build the pool file:
+
+        python scramble_pool.py [--per-bucket 200] [--max-depth 40]
+
+    The game only reads the small index of the pool file when it starts, then
+    picks a board of the requested difficulty with a single seek and read.
+
+    Pool file format (all integers little-endian):
+        header:  b'SPPL', version (B), number of sections (B)
+        section: tile number (B), bucket count (B), bucket table offset (I)
+        bucket table (one entry per optimal length 0, 1, 2...):
+                 records offset (I), records count (I)
+        record:  a board, two tiles (4 bits each) per byte
+"""
+
+import argparse                      # command line options
+import math                          # calculate sqrt, ceil integer
+import random                        # sample boards
+import struct                        # pack the binary pool file
+from configs import *                # configuration of the Game
+import solver                        # scramble and solve boards
+
+MAGIC = b'SPPL'
+VERSION = 1
+HEADER = struct.Struct('<4sBB')
+SECTION = struct.Struct('<BBI')
+BUCKET = struct.Struct('<II')
+
+
+def pack_board(board):
+    """
+    Pack a board into bytes, two tiles (4 bits each) per byte
+    Params -- board: a tuple (or list), each element is a tile index (< 16)
+    Return -- a bytes object, math.ceil(len(board) / 2) bytes long
+    """
+
+    data = bytearray()
+    for i in range(0, len(board), 2):
+        low = board[i + 1] if i + 1 < len(board) else 0
+        data.append((board[i] << 4) | low)
+    return bytes(data)
+
+
+def unpack_board(data, number):
+    """
+    Unpack a board packed by pack_board()
+    Params -- data: a bytes object, the packed board
+              number: an int, the tile number of the board
+    Return -- a list, the board
+    """
+
+    board = []
+    for byte in data:
+        board.append(byte >> 4)
+        board.append(byte & 0x0F)
+    return board[:number]
+
+
+def record_size(number):
+    """Return the packed board size (int) in bytes of a tile number. """
+
+    return math.ceil(number / 2)
+
+
+def build_buckets(n, per_bucket, max_depth, rng=random):
+    """
+    Build the buckets of an n x n puzzle. Small boards are graded exactly by
+    a breadth first search over all boards; 4 x 4 boards are scrambled by
+    random walks and graded by IDA*, up to max_depth
+    Params -- n: an int, number of rows/columns
+              per_bucket: an int, maximum number of boards in a bucket
+              max_depth: an int, the longest optimal length for 4 x 4 boards
+              rng: a random.Random like object, default to the random module
+    Return -- a list, the i-th element is a list of boards whose optimal
+              solution length is i
+    """
+
+    buckets = []
+    if n <= 3:
+        for board, dist in solver.bfs_distances(n).items():
+            while len(buckets) <= dist:
+                buckets.append([])
+            buckets[dist].append(board)
+        return [rng.sample(each, min(len(each), per_bucket))
+                for each in buckets]
+
+    buckets = [set() for i in range(max_depth + 1)]
+    for depth in range(1, max_depth + 1):
+        tries = 0
+        # a walk is usually solved in fewer moves than its slides, so walk
+        # up to twice as far (keeping the parity) to fill this bucket
+        while len(buckets[depth]) < per_bucket and tries < per_bucket * 4:
+            tries += 1
+            board = solver.random_walk(n, depth + rng.randrange(0, depth + 1,
+                                                                2), rng)
+            dist = solver.ida_star(board, n, max_depth)
+            if (dist is not None and dist <= max_depth
+                    and len(buckets[dist]) < per_bucket):
+                buckets[dist].add(board)
+    return [sorted(each) for each in buckets]
+
+
+def write_pool(file_name, sections):
+    """
+    Write buckets of all tile numbers to the pool file
+    Params -- file_name: a string, the pool file name
+              sections: a dictionary, key: tile number (int), value: buckets
+                        (see build_buckets())
+    Return -- None
+    """
+
+    # offsets of the bucket tables, then the records after all tables
+    offset = HEADER.size + SECTION.size * len(sections)
+    table_offsets = {}
+    for number, buckets in sections.items():
+        table_offsets[number] = offset
+        offset += BUCKET.size * len(buckets)
+
+    with open(file_name, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(sections)))
+        for number, buckets in sections.items():
+            f.write(SECTION.pack(number, len(buckets), table_offsets[number]))
+        for number, buckets in sections.items():
+            for boards in buckets:
+                f.write(BUCKET.pack(offset, len(boards)))
+                offset += record_size(number) * len(boards)
+        for number, buckets in sections.items():
+            for boards in buckets:
+                f.write(b''.join(pack_board(each) for each in boards))
+
+
+def read_pool_index(file_name):
+    """
+    Read the index (bucket tables) of the pool file
+    Params -- file_name: a string, the pool file name
+    Return -- a dictionary, key: tile number (int), value: a list, the i-th
+              element is (records offset, records count) of length i boards.
+              Raise IOError if the file can not be read, ValueError if it is
+              not a pool file
+    """
+
+    index = {}
+    with open(file_name, 'rb') as f:
+        magic, version, count = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError
+        sections = [SECTION.unpack(f.read(SECTION.size))
+                    for i in range(count)]
+        for number, bucket_count, table_offset in sections:
+            f.seek(table_offset)
+            index[number] = [BUCKET.unpack(f.read(BUCKET.size))
+                             for i in range(bucket_count)]
+    return index
+
+
+def pick_board(file_name, index, number, length, rng=random):
+    """
+    Pick a random board of a tile number whose optimal solution length is
+    the given length. If that bucket is empty, use the nearest shorter one
+    Params -- file_name: a string, the pool file name
+              index: a dictionary, the pool index (see read_pool_index())
+              number: an int, the tile number
+              length: an int, the wanted optimal solution length
+              rng: a random.Random like object, default to the random module
+    Return -- a list, the board; None if no board is available
+    """
+
+    buckets = index.get(number, [])
+    length = min(length, len(buckets) - 1)
+    while length > 0 and buckets[length][1] == 0:
+        length -= 1
+    if length <= 0:           # never give an unscrambled board
+        return None
+    offset, count = buckets[length]
+    size = record_size(number)
+    with open(file_name, 'rb') as f:
+        f.seek(offset + rng.randrange(count) * size)
+        return unpack_board(f.read(size), number)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build the scramble pool file ({}).'.format(POOL_FILE))
+    parser.add_argument('--per-bucket', type=int, default=200,
+                        help='maximum number of boards of each length')
+    parser.add_argument('--max-depth', type=int, default=40,
+                        help='longest optimal length of 4 x 4 boards')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=POOL_FILE)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sections = {}
+    for number in sorted(VALID_NUMS):
+        n = int(math.sqrt(number))
+        sections[number] = build_buckets(n, args.per_bucket, args.max_depth,
+                                         rng)
+        print('{:2d} tiles: {} boards, longest {} moves'.format(
+            number, sum(len(each) for each in sections[number]),
+            len(sections[number]) - 1))
+    write_pool(args.output, sections)
+
+
+if __name__ == "__main__":
+    main()
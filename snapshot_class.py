@@ -0,0 +1,182 @@
+"""
+    Project: Puzzle Slider Game -- Snapshot class
+    Save the game in progress to a small binary snapshot file, so the next
+    launch can resume it straight into the board.
+
+    Snapshot file format (all integers little-endian):
+        header: b'SPSN', version (B), max_move_num (H), player_moves (H),
+                tile number (B)
+        board:  two tiles (4 bits each) per byte (see scramble_pool.py)
+        puzzle: file name length (B), file name (utf-8)
+        player: name length (H), name (utf-8)
+"""
+
+import atexit                        # write the last snapshot at exit
+import os                            # replace the file atomically
+import struct                        # pack the binary snapshot
+import threading                     # write snapshots in the background
+import time                          # batch snapshots
+from scramble_pool import pack_board, unpack_board, record_size
+
+MAGIC = b'SPSN'
+VERSION = 1
+HEADER = struct.Struct('<4sBHHB')
+NAME_LENGTH = struct.Struct('<H')
+
+
+def pack_snapshot(snapshot):
+    """
+    Pack a snapshot into bytes
+    Params -- snapshot: a dictionary, keys: 'puzzle' (str, the .puz file
+              name), 'board' (list, board[pos] is the original index of the
+              tile at pos), 'player_moves' (int), 'max_move_num' (int),
+              'player_name' (str)
+    Return -- a bytes object, the snapshot file content
+    """
+
+    puzzle = snapshot['puzzle'].encode('utf-8')[:255]
+    player = snapshot['player_name'].encode('utf-8')
+    return (HEADER.pack(MAGIC, VERSION, snapshot['max_move_num'],
+                        snapshot['player_moves'], len(snapshot['board']))
+            + pack_board(snapshot['board'])
+            + bytes([len(puzzle)]) + puzzle
+            + NAME_LENGTH.pack(len(player)) + player)
+
+
+def read_snapshot(file_name):
+    """
+    Read a snapshot file
+    Params -- file_name: a string, the snapshot file name
+    Return -- a dictionary, the snapshot (see pack_snapshot()); None if there
+              is no snapshot, or the file is broken
+    """
+
+    try:
+        with open(file_name, 'rb') as f:
+            data = f.read()
+        magic, version, max_move_num, player_moves, number = \
+            HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return None
+        pos = HEADER.size + record_size(number)
+        board = unpack_board(data[HEADER.size:pos], number)
+        length = data[pos]
+        puzzle = data[pos + 1:pos + 1 + length].decode('utf-8')
+        pos += 1 + length
+        length, = NAME_LENGTH.unpack_from(data, pos)
+        pos += NAME_LENGTH.size
+        player_name = data[pos:pos + length].decode('utf-8')
+    except (IOError, IndexError, UnicodeDecodeError, struct.error):
+        return None
+    if len(board) != number:
+        return None
+    return {'puzzle': puzzle, 'board': board, 'player_moves': player_moves,
+            'max_move_num': max_move_num, 'player_name': player_name}
+
+
+class SnapshotWriter:
+    """
+    A SnapshotWriter keeps the latest snapshot of the game, and writes it to
+    the snapshot file from a background thread. Snapshots saved within
+    'interval' seconds are batched into one write, so a mouse click only
+    packs a few bytes. Each write goes to a temporary file that then replaces
+    the snapshot file, so the file is never half written. The pending
+    snapshot is also written when the program exits (e.g. the window is
+    closed by its title bar, which skips Game.close_window())
+    """
+
+    def __init__(self, file_name, interval=1.0):
+        """
+        Create a SnapshotWriter and start its background thread
+        Params -- file_name: a string, the snapshot file name
+                  interval: a float, seconds to batch snapshots, default 1.0
+        Return -- None
+        """
+
+        self.file_name = file_name
+        self.interval = interval
+        self._pending = None          # the latest snapshot not written yet
+        self._lock = threading.Lock()          # guards the pending snapshot
+        self._write_lock = threading.Lock()    # guards the snapshot file
+        self._saved = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def __str__(self):
+        """When printing, indicate the snapshot file. """
+
+        return "SnapshotWriter of {}".format(self.file_name)
+
+    def save(self, snapshot):
+        """
+        Keep a new snapshot, to be written by the background thread
+        Params -- snapshot: a dictionary (see pack_snapshot())
+        Return -- None
+        """
+
+        data = pack_snapshot(snapshot)
+        with self._lock:
+            self._pending = data
+        self._saved.set()
+
+    def flush(self):
+        """
+        Write the pending snapshot (if any) now
+        Params -- None
+        Return -- None
+        """
+
+        with self._write_lock:     # save() only waits for the swap below
+            with self._lock:
+                data, self._pending = self._pending, None
+            if data is not None:
+                self._write(data)
+
+    def discard(self):
+        """
+        Drop the pending snapshot and delete the snapshot file, when the game
+        is over and there is nothing to resume
+        Params -- None
+        Return -- None
+        """
+
+        with self._write_lock:
+            with self._lock:
+                self._pending = None
+            try:
+                os.remove(self.file_name)
+            except OSError:
+                pass
+
+    def _run(self):
+        """
+        The background thread: wait for a snapshot, wait 'interval' seconds
+        for later ones, then write the latest
+        Params -- None
+        Return -- None
+        """
+
+        while True:
+            self._saved.wait()
+            time.sleep(self.interval)
+            self._saved.clear()
+            try:
+                self.flush()
+            except OSError:
+                pass       # try again with the next snapshot
+
+    def _write(self, data):
+        """
+        Write snapshot bytes to a temporary file, then replace the snapshot
+        file with it
+        Params -- data: a bytes object, the packed snapshot
+        Return -- None
+        """
+
+        temp_name = self.file_name + '.tmp'
+        with open(temp_name, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_name, self.file_name)
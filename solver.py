@@ -0,0 +1,381 @@
+"""
+    Project: Puzzle Slider Game -- Solver
+    Helper functions to scramble and optimally solve the sliding puzzle. They
+    are used offline (see scramble_pool.py) to grade scrambled boards by their
+    optimal solution length, so they do not depend on turtle at all.
+
+    A board is a tuple of tile indexes ordered by position from left-top to
+    right-bottom row after row (the same order as Game.generate_positions()),
+    i.e. board[pos] is the original unscrambled index of the tile at pos. The
+    blank tile is always the last one, index n * n - 1
+"""
+
+import argparse                      # command line options
+import math                          # calculate sqrt
+import random                        # random walk scrambles
+import sys                           # size of table entries
+import time                          # nodes per second
+import tracemalloc                   # peak memory of a search
+from collections import deque        # breadth first search queue
+from configs import VALID_NUMS       # valid tile numbers
+
+# the longest optimal solutions of n x n boards (the deepest search path)
+MAX_DEPTHS = {2: 6, 3: 31, 4: 80}
+FRAME_BYTES = 512        # estimated memory of one level of the search path
+
+
+def get_goal(n):
+    """
+    Get the unscrambled board of an n x n puzzle
+    Params -- n: an int, number of rows/columns
+    Return -- a tuple, the unscrambled board
+    """
+
+    return tuple(range(n * n))
+
+
+def get_neighbors(n):
+    """
+    Get the horizontal and vertical neighbor positions of every position
+    Params -- n: an int, number of rows/columns
+    Return -- a list, the i-th element is a tuple of positions next to i
+    """
+
+    neighbors = []
+    for pos in range(n * n):
+        row, col = divmod(pos, n)
+        near = []
+        if row > 0:
+            near.append(pos - n)
+        if row < n - 1:
+            near.append(pos + n)
+        if col > 0:
+            near.append(pos - 1)
+        if col < n - 1:
+            near.append(pos + 1)
+        neighbors.append(tuple(near))
+    return neighbors
+
+
+def is_solvable(board, n):
+    """
+    Check whether a board can be unscrambled by sliding tiles (half of all
+    permutations can not). Count the inversions of the numbered tiles; for an
+    even n the row distance of the blank to the bottom row also counts
+    Params -- board: a tuple (or list), the board to check
+              n: an int, number of rows/columns
+    Return -- Boolean, True if the board is solvable, False otherwise
+    """
+
+    blank = n * n - 1
+    tiles = [each for each in board if each != blank]
+    inversions = 0
+    for i in range(len(tiles)):
+        for j in range(i + 1, len(tiles)):
+            if tiles[i] > tiles[j]:
+                inversions += 1
+    if n % 2 == 1:
+        return inversions % 2 == 0
+    blank_row = list(board).index(blank) // n
+    return (inversions + (n - 1 - blank_row)) % 2 == 0
+
+
+def random_walk(n, steps, rng=random):
+    """
+    Scramble an unscrambled board by sliding random tiles into the blank,
+    never undoing the previous slide. The result is always solvable in no
+    more than 'steps' moves
+    Params -- n: an int, number of rows/columns
+              steps: an int, number of slides
+              rng: a random.Random like object, default to the random module
+    Return -- a tuple, the scrambled board
+    """
+
+    neighbors = get_neighbors(n)
+    board = list(get_goal(n))
+    blank = n * n - 1            # the blank starts at the last position
+    previous = -1
+    for i in range(steps):
+        choices = [pos for pos in neighbors[blank] if pos != previous]
+        pos = rng.choice(choices)
+        board[blank], board[pos] = board[pos], board[blank]
+        previous, blank = blank, pos
+    return tuple(board)
+
+
+def bfs_distances(n):
+    """
+    Get the optimal solution length of every solvable board, by a breadth
+    first search starting from the unscrambled board. Only practical for
+    small boards (n <= 3, 181440 boards)
+    Params -- n: an int, number of rows/columns
+    Return -- a dictionary, key: board (tuple), value: optimal length (int)
+    """
+
+    neighbors = get_neighbors(n)
+    goal = get_goal(n)
+    distances = {goal: 0}
+    queue = deque([(goal, n * n - 1)])   # (board, blank position)
+    while queue:
+        board, blank = queue.popleft()
+        dist = distances[board] + 1
+        for pos in neighbors[blank]:
+            new_board = list(board)
+            new_board[blank], new_board[pos] = new_board[pos], new_board[blank]
+            new_board = tuple(new_board)
+            if new_board not in distances:
+                distances[new_board] = dist
+                queue.append((new_board, pos))
+    return distances
+
+
+def get_distance_table(n):
+    """
+    Get the manhattan distance of every tile at every position to its
+    unscrambled position. The blank tile always gets 0
+    Params -- n: an int, number of rows/columns
+    Return -- a list, table[tile][pos] is the distance (int)
+    """
+
+    table = []
+    for tile in range(n * n):
+        row, col = divmod(tile, n)
+        table.append([0 if tile == n * n - 1 else
+                      abs(row - pos // n) + abs(col - pos % n)
+                      for pos in range(n * n)])
+    return table
+
+
+def ida_star(board, n, limit=None):
+    """
+    Get the optimal solution length of a board by iterative deepening A*
+    with the manhattan distance heuristic. It only keeps the current path in
+    memory, so it suits the 4 x 4 boards that bfs_distances() can not cover
+    Params -- board: a tuple (or list), a solvable board
+              n: an int, number of rows/columns
+              limit: an int, give up on solutions longer than it, default to
+                     None (no limit)
+    Return -- an int, the optimal solution length; None if it is over limit
+    """
+
+    return solve(board, n, limit=limit)['length']
+
+
+def parse_memory(text):
+    """
+    Parse a memory size such as '512K', '64M', '1G' or '1000' (bytes)
+    Params -- text: a string, the memory size
+    Return -- an int, number of bytes. Raise ValueError if malformed
+    """
+
+    units = {'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30}
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def get_entry_size(n):
+    """
+    Get the memory of a transposition table entry: a list slot holding a
+    (key, g, bound) tuple, the key is an int encoding of the board
+    Params -- n: an int, number of rows/columns
+    Return -- an int, number of bytes
+    """
+
+    key = (n * n) ** (n * n) - 1                  # the largest key
+    return 8 + sys.getsizeof((key, 0, 0)) + sys.getsizeof(key)
+
+
+def get_search_overhead(n):
+    """
+    Get the memory a search needs besides the table entries: the lookup
+    tables, the board, the empty table list, and the deepest search path
+    Params -- n: an int, number of rows/columns
+    Return -- an int, number of bytes
+    """
+
+    number = n * n
+    lists = [get_neighbors(n), get_distance_table(n),
+             [number ** pos for pos in range(number)], list(range(number))]
+    size = sys.getsizeof([])
+    for each in lists:
+        size += sys.getsizeof(each)
+        size += sum(sys.getsizeof(item) for item in each)
+    depth = MAX_DEPTHS.get(n, number * n)
+    return size + depth * FRAME_BYTES
+
+
+def get_table_capacity(n, memory):
+    """
+    Get how many transposition table entries fit in a memory budget, after
+    the fixed search overhead (see get_search_overhead())
+    Params -- n: an int, number of rows/columns
+              memory: an int, the memory budget in bytes
+    Return -- an int, number of entries
+    """
+
+    return max(0, (memory - get_search_overhead(n)) // get_entry_size(n))
+
+
+def solve(board, n, memory=None, policy='depth', limit=None, trace=False):
+    """
+    Get the optimal solution length of a board by iterative deepening A*
+    with a transposition table of fixed size. The table gets what is left of
+    the memory budget after the fixed search overhead (see
+    get_search_overhead()), so the whole search stays within the budget.
+    The table drops boards already reached by a path no longer than the
+    current one. When two boards need the same
+    slot, the policy decides which one stays:
+        'depth': keep the board reached by the shorter path (its subtree is
+                 larger), unless the slot is left from an earlier iteration
+        'always': always keep the new board
+    Params -- board: a tuple (or list), a solvable board
+              n: an int, number of rows/columns
+              memory: an int, the memory budget of the search in bytes,
+                      default to None (no budget and no table, plain IDA*)
+              policy: a string, 'depth' or 'always', default to 'depth'
+              limit: an int, give up on solutions longer than it, default to
+                     None (no limit)
+              trace: Boolean, measure the peak memory by tracemalloc,
+                     default to False. Tracing slows the search down many
+                     times, so 'nodes_per_sec' of a traced search is not a
+                     fair speed
+    Return -- a dictionary, 'length': the optimal solution length (None if
+              it is over limit), 'nodes': number of boards searched,
+              'seconds', 'nodes_per_sec', 'table_size': number of entries,
+              'table_hits': number of boards dropped by the table,
+              'peak_memory': peak bytes, measured if traced, otherwise
+              accounted (the overhead plus the table entries used).
+              Raise ValueError if the policy is unknown, or the budget is
+              smaller than the search overhead
+    """
+
+    if policy not in ('depth', 'always'):
+        raise ValueError
+    if memory is not None and memory < get_search_overhead(n):
+        raise ValueError('memory budget {} is below the search overhead {}'
+                         .format(memory, get_search_overhead(n)))
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+
+    number = n * n
+    neighbors = get_neighbors(n)
+    table = get_distance_table(n)
+    weights = [number ** pos for pos in range(number)]   # key of a board
+    board = list(board)
+    blank = board.index(number - 1)
+    h = sum(table[board[pos]][pos] for pos in range(number))
+    key = sum(board[pos] * weights[pos] for pos in range(number))
+    capacity = 0 if memory is None else get_table_capacity(n, memory)
+    slots = [None] * capacity
+    replace_always = policy == 'always'
+    nodes = hits = filled = 0
+
+    def search(blank, key, g, h, bound, previous):
+        # return -1 when solved, otherwise the smallest f over the bound
+        nonlocal nodes, hits, filled
+        nodes += 1
+        f = g + h
+        if f > bound:
+            return f
+        if h == 0:
+            return -1
+        if capacity:
+            i = key % capacity
+            slot = slots[i]
+            if slot is not None and slot[0] == key and slot[2] == bound:
+                if slot[1] <= g:      # reached no later in this iteration
+                    hits += 1
+                    return float('inf')
+                slots[i] = (key, g, bound)
+            elif slot is None:
+                filled += 1
+                slots[i] = (key, g, bound)
+            elif replace_always or slot[2] != bound or g <= slot[1]:
+                slots[i] = (key, g, bound)
+        minimum = float('inf')
+        for pos in neighbors[blank]:
+            if pos == previous:          # never undo the previous slide
+                continue
+            tile = board[pos]
+            new_h = h - table[tile][pos] + table[tile][blank]
+            # the tile goes to blank, the blank (number - 1) goes to pos
+            new_key = key + (tile - number + 1) * (weights[blank]
+                                                   - weights[pos])
+            board[blank], board[pos] = tile, board[blank]
+            t = search(pos, new_key, g + 1, new_h, bound, blank)
+            board[pos], board[blank] = tile, board[pos]
+            if t == -1:
+                return -1
+            minimum = min(minimum, t)
+        return minimum
+
+    length = None
+    bound = h
+    try:
+        # every bound searched (the first is h) must be within the limit
+        while limit is None or bound <= limit:
+            t = search(blank, key, 0, h, bound, -1)
+            if t == -1:
+                length = bound
+                break
+            if t == float('inf'):
+                break
+            bound = t
+    finally:
+        seconds = time.perf_counter() - start
+        if trace:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            # the table slot pointers are in the overhead and entry sizes
+            peak_memory = (get_search_overhead(n)
+                           + filled * (get_entry_size(n) - 8) + 8 * capacity)
+    return {'length': length, 'nodes': nodes, 'seconds': seconds,
+            'nodes_per_sec': nodes / seconds if seconds else 0.0,
+            'table_size': capacity, 'table_hits': hits,
+            'peak_memory': peak_memory}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Solve random boards within a memory budget.')
+    parser.add_argument('--number', type=int, default=16,
+                        choices=sorted(VALID_NUMS), help='tile number')
+    parser.add_argument('--steps', type=int, default=60,
+                        help='random walk slides to scramble a board')
+    parser.add_argument('--boards', type=int, default=5)
+    parser.add_argument('--memory', default='64M',
+                        help="search memory budget, e.g. '512K', '64M'")
+    parser.add_argument('--policy', default='depth',
+                        choices=('depth', 'always'))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--trace', action='store_true',
+                        help='solve each board again with tracemalloc to '
+                             'measure the peak memory')
+    args = parser.parse_args()
+
+    n = int(math.sqrt(args.number))
+    memory = parse_memory(args.memory)
+    if memory < get_search_overhead(n):
+        parser.error('--memory must be at least the search overhead, {} '
+                     'bytes'.format(get_search_overhead(n)))
+    rng = random.Random(args.seed)
+    print('{} tiles, budget {} bytes, {} table entries'.format(
+        args.number, memory, get_table_capacity(n, memory)))
+    for i in range(args.boards):
+        board = random_walk(n, args.steps, rng)
+        stats = solve(board, n, memory, args.policy)   # untraced speed
+        line = ('length {length:3d}  nodes {nodes:9d}  {nodes_per_sec:9.0f} '
+                'nodes/s  hits {table_hits:8d}  peak {peak_memory:10d} bytes'
+                ' (accounted)'.format(**stats))
+        if args.trace:
+            traced = solve(board, n, memory, args.policy, trace=True)
+            line += ', {:d} bytes (traced)'.format(traced['peak_memory'])
+        print(line)
+
+
+if __name__ == "__main__":
+    main()